@@ -1,14 +1,31 @@
 # region imports
+import math
+import os
 import numpy as np
-from scipy.optimize import fsolve
+from scipy.optimize import root_scalar
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FormatStrFormatter
+from matplotlib.collections import LineCollection
+from numba_compat import njit, prange
+
+try:
+    from colebrook_ext import ff_cb as _ff_cb_aot  # compiled with: cythonize -i colebrook_ext.pyx
+except ImportError:  # extension not built; ff falls back to scipy's Halley solver
+    _ff_cb_aot = None
+
+# endregion
+
+# region Global Variables
+INV_LN10 = 1.0 / math.log(10.0)  # log10(z) == log(z) * INV_LN10; log is the faster call in compiled code
+TWO_INV_LN10 = 2.0 * INV_LN10  # Coefficient of the log term in the Colebrook residual and its derivatives
+MOODY_GRID_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'moody_grid.npz')
+MOODY_GRID_VERSION = 1  # Bump with any change to ff_cb or the grid axes so a stale MOODY_GRID_FILE is rebuilt
 
 
 # endregion
 
 # region functions
-def ff(Re, rr, CBEQN=False):
+def ff(Re, rr, CBEQN=False, f0=None):
     """
     Calculates the Darcy-Weisbach friction factor for pipe flow.
 
@@ -16,19 +33,201 @@ def ff(Re, rr, CBEQN=False):
     Re (float): Reynolds number.
     rr (float): Relative pipe roughness (between 0 and 0.05).
     CBEQN (bool): If True, uses the Colebrook equation; otherwise, uses the laminar equation.
+    f0 (float): Optional initial guess for the Colebrook solve, e.g. the converged value at a
+        neighbouring Reynolds number when sweeping; defaults to the Swamee-Jain estimate, which is
+        also used if f0 is not positive or the iteration from f0 fails.
 
     Returns:
     float: Friction factor.
     """
     if CBEQN:
-        # Colebrook equation as an implicit function for fsolve
-        cb = lambda f: 1 / np.sqrt(f) + 2.0 * np.log10(rr / 3.7 + 2.51 / (Re * np.sqrt(f)))
-        result = fsolve(cb, 0.02)  # Initial guess for fsolve is 0.02
-        return result[0]
+        if _ff_cb_aot is not None:
+            return _ff_cb_aot(Re, rr, 0.0 if f0 is None else f0)  # Compiled Halley solver, no scipy call
+        # Halley's method on the Colebrook residual; _colebrook_terms supplies g and both derivatives
+        k = rr / 3.7  # Constant roughness term, computed once per solve
+        c = 2.51 / Re
+
+        def halley(guess):
+            return root_scalar(_colebrook_terms, args=(k, c), x0=guess, fprime=True, fprime2=True,
+                               method='halley', xtol=1e-10, maxiter=20)
+
+        if f0 is not None and f0 > 0:
+            try:
+                sol = halley(f0)
+                if sol.converged and sol.root > 0:
+                    return sol.root
+            except ValueError:
+                pass  # A step from f0 went to f <= 0; restart from Swamee-Jain below
+        return halley(_swamee_jain(Re, k)).root
     else:
         return 64 / Re  # Laminar flow equation
 
 
+@njit(cache=True)
+def _swamee_jain(Re, k):
+    """
+    Swamee-Jain explicit estimate of the Colebrook friction factor, used to seed Halley's method.
+
+    Parameters:
+    Re (float): Reynolds number.
+    k (float): Roughness term rr/3.7.
+
+    Returns:
+    float: Approximate friction factor.
+    """
+    return 0.25 / (math.log(k + 5.74 / Re ** 0.9) * INV_LN10) ** 2
+
+
+@njit(cache=True)
+def _colebrook_terms(f, k, c):
+    """
+    Evaluates the Colebrook residual and its first two derivatives with respect to f.
+
+    With u = 1/sqrt(f) the residual is g(f) = u + 2*log10(k + c*u), where k = rr/3.7 and
+    c = 2.51/Re; the derivatives follow from the chain rule through u. This is the single
+    Python/Numba copy of the Halley terms (colebrook_ext.pyx mirrors it in C).
+
+    Parameters:
+    f (float): Trial friction factor (must be positive).
+    k (float): Roughness term rr/3.7.
+    c (float): Reynolds term 2.51/Re.
+
+    Returns:
+    tuple: (g, dg/df, d2g/df2).
+    """
+    u = 1 / math.sqrt(f)
+    z = k + c * u
+    g = u + TWO_INV_LN10 * math.log(z)
+    g_u = 1 + TWO_INV_LN10 * c / z
+    g_uu = -TWO_INV_LN10 * c ** 2 / z ** 2
+    u_f = -0.5 * u ** 3
+    u_ff = 0.75 * u ** 5
+    return g, g_u * u_f, g_uu * u_f ** 2 + g_u * u_ff
+
+
+@njit(cache=True)
+def ff_cb(Re, rr, f0=0.0):
+    """
+    Solves the Colebrook equation for a single Reynolds number and relative roughness.
+
+    Runs a Halley iteration using only the math module, so it compiles with Numba when
+    available and avoids the scipy root-finder call overhead.
+
+    Parameters:
+    Re (float): Reynolds number.
+    rr (float): Relative pipe roughness.
+    f0 (float): Initial guess; values <= 0 select the Swamee-Jain estimate, which is also the
+        restart point if a step from f0 leaves f > 0.
+
+    Returns:
+    float: Friction factor.
+    """
+    k = rr / 3.7  # Constant roughness term, hoisted out of the iteration
+    c = 2.51 / Re
+    f_sj = _swamee_jain(Re, k)
+    f = f0 if f0 > 0 else f_sj
+    for _ in range(10):
+        g, g_f, g_ff = _colebrook_terms(f, k, c)
+        df = 2 * g * g_f / (2 * g_f ** 2 - g * g_ff)  # Halley step
+        f = f - df
+        if not f > 0:  # Poor guess stepped out of range; restart from Swamee-Jain
+            f = f_sj
+        elif abs(df) < 1e-12 * f:  # Converged; cubic convergence usually gets here in two steps
+            break
+    return f
+
+
+# Scalar Colebrook solver for callers outside Numba code: the ahead-of-time build when it has been
+# compiled (no JIT warm-up on the first call), otherwise the Numba version above
+ff_colebrook = _ff_cb_aot if _ff_cb_aot is not None else ff_cb
+
+
+@njit(parallel=True, cache=True)
+def ff_cb_grid(Re, rrVals):
+    """
+    Solves the Colebrook equation on the grid of Reynolds numbers and relative roughnesses.
+
+    Each roughness row is independent, so the rows are distributed across cores with prange.
+
+    Parameters:
+    Re (ndarray): 1-D array of Reynolds numbers.
+    rrVals (ndarray): 1-D array of relative pipe roughness values.
+
+    Returns:
+    ndarray: Friction factors with shape (len(rrVals), len(Re)).
+    """
+    out = np.empty((rrVals.size, Re.size))
+    for i in prange(rrVals.size):
+        for j in range(Re.size):
+            out[i, j] = ff_cb(Re[j], rrVals[i])
+    return out
+
+
+def ff_colebrook_vec(Re, rr):
+    """
+    Solves the Colebrook equation for arrays of Reynolds numbers and relative roughnesses.
+
+    Uses Halley iteration started from the Swamee-Jain explicit approximation, so three
+    iterations reach machine precision without calling a root finder for each point.
+
+    Parameters:
+    Re (array_like): Reynolds numbers (broadcast against rr).
+    rr (array_like): Relative pipe roughness values (broadcast against Re).
+
+    Returns:
+    ndarray: Friction factors with the broadcast shape of Re and rr.
+    """
+    Re = np.asarray(Re, dtype=float)
+    rr = np.asarray(rr, dtype=float)
+    k = rr / 3.7  # Roughness term, computed once and broadcast against Re in every iteration
+    f = 0.25 / (np.log(k + 5.74 / Re ** 0.9) * INV_LN10) ** 2  # Swamee-Jain initial guess
+    c = 2.51 / Re
+    for _ in range(3):
+        u = 1 / np.sqrt(f)  # Colebrook is written in terms of u = 1/sqrt(f)
+        z = k + c * u
+        g = u + TWO_INV_LN10 * np.log(z)
+        g_u = 1 + TWO_INV_LN10 * c / z
+        g_uu = -TWO_INV_LN10 * c ** 2 / z ** 2
+        u_f = -0.5 * u ** 3
+        u_ff = 0.75 * u ** 5
+        g_f = g_u * u_f
+        g_ff = g_uu * u_f ** 2 + g_u * u_ff
+        f = f - 2 * g * g_f / (2 * g_f ** 2 - g * g_ff)  # Halley update
+    return f
+
+
+def moodyGrid():
+    """
+    Returns the turbulent (Colebrook) family of the Moody diagram.
+
+    The grid only depends on fixed Reynolds number and roughness values, so it is computed
+    once with ff_cb_grid and saved to MOODY_GRID_FILE; later runs load it from disk as long as
+    the saved MOODY_GRID_VERSION and axes still match.
+
+    Returns:
+    tuple: (ReValsCB, rrVals, ffCB) where ffCB has shape (len(rrVals), len(ReValsCB)).
+    """
+    ReValsCB = np.logspace(np.log10(4000), np.log10(1e8), 100)  # Turbulent range
+    rrVals = np.array([0, 1E-6, 5E-6, 1E-5, 5E-5, 1E-4, 2E-4, 4E-4, 6E-4, 8E-4,
+                       1E-3, 2E-3, 4E-3, 6E-3, 8E-3, 1.5E-2, 2E-2, 3E-2, 4E-2, 5E-2])
+
+    try:
+        with np.load(MOODY_GRID_FILE) as data:
+            if (int(data['version']) == MOODY_GRID_VERSION and np.array_equal(data['ReValsCB'], ReValsCB)
+                    and np.array_equal(data['rrVals'], rrVals)):
+                return ReValsCB, rrVals, data['ffCB']
+    except (OSError, KeyError, ValueError):
+        pass  # Missing, unreadable or pre-versioning cache; rebuild it below
+
+    ffCB = ff_cb_grid(ReValsCB, rrVals)
+    try:
+        np.savez_compressed(MOODY_GRID_FILE, version=MOODY_GRID_VERSION, ReValsCB=ReValsCB, rrVals=rrVals,
+                            ffCB=ffCB)
+    except OSError:
+        pass  # Read-only location; recompute next time
+    return ReValsCB, rrVals, ffCB
+
+
 def plotMoody(plotPoint=False, pt=(0, 0)):
     """
     Generates a Moody diagram plotting the friction factor as a function of Reynolds number.
@@ -40,27 +239,29 @@ def plotMoody(plotPoint=False, pt=(0, 0)):
     Returns:
     None
     """
-    # Step 1: Create log-spaced arrays for different Reynolds number ranges
-    ReValsCB = np.logspace(np.log10(4000), np.log10(1e8), 100)  # Turbulent range
+    # Step 1: Create log-spaced arrays for the laminar and transition ranges
     ReValsL = np.logspace(np.log10(600), np.log10(2000), 20)  # Laminar range
     ReValsTrans = np.logspace(np.log10(2000), np.log10(4000), 20)  # Transition range
 
-    # Step 2: Create array for range of relative roughness values
-    rrVals = np.array([0, 1E-6, 5E-6, 1E-5, 5E-5, 1E-4, 2E-4, 4E-4, 6E-4, 8E-4,
-                       1E-3, 2E-3, 4E-3, 6E-3, 8E-3, 1.5E-2, 2E-2, 3E-2, 4E-2, 5E-2])
+    # Step 2: Load the turbulent range over the relative roughness values
+    ReValsCB, rrVals, ffCB = moodyGrid()
 
     # Step 3: Calculate friction factor values
-    ffLam = np.array([ff(Re, 0, False) for Re in ReValsL])  # Laminar range
-    ffTrans = np.array([ff(Re, 0, False) for Re in ReValsTrans])  # Transition range
-    ffCB = np.array([[ff(Re, relRough, True) for Re in ReValsCB] for relRough in rrVals])  # Turbulent range
+    ffLam = 64 / ReValsL  # Laminar range
+    ffTrans = 64 / ReValsTrans  # Transition range
 
     # Step 4: Construct the plot
     plt.figure(figsize=(10, 6))
     plt.loglog(ReValsL, ffLam, 'b-', label='Laminar Flow')  # Solid line for laminar flow
     plt.loglog(ReValsTrans, ffTrans, 'b--', label='Transition Flow')  # Dashed line for transition
 
+    # Turbulent flow for different roughnesses, drawn as one collection of curves
+    ax = plt.gca()
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    segs = np.stack((np.broadcast_to(ReValsCB, ffCB.shape), ffCB), axis=-1)
+    ax.add_collection(LineCollection(segs, colors='k', linewidths=1))
     for nRelR in range(len(ffCB)):
-        plt.loglog(ReValsCB, ffCB[nRelR], 'k')  # Turbulent flow for different roughnesses
         plt.annotate(f'{rrVals[nRelR]:.0e}', xy=(ReValsCB[-1], ffCB[nRelR, -1]))
 
     # Formatting
@@ -70,7 +271,6 @@ def plotMoody(plotPoint=False, pt=(0, 0)):
     plt.ylabel(r"Friction factor $f$")
     plt.text(2.5E8, 0.02, r"Relative roughness $rac{\epsilon}{d}$", rotation=90)
 
-    ax = plt.gca()
     ax.tick_params(axis='both', which='both', direction='in', top=True, right=True, labelsize=12)
     ax.yaxis.set_minor_formatter(FormatStrFormatter("%.3f"))
     plt.grid(which='both')
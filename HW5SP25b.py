@@ -1,11 +1,18 @@
 # region imports
 import HW5SP25a as pta  # Import external module for friction factor calculations and plotting
-import random as rnd  # Import random module for probabilistic calculations
+import math
 import numpy as np
 from matplotlib import pyplot as plt
+from matplotlib.collections import LineCollection
 
 # region Global Variables
+GPM_TO_CFS = 1 / 448.831  # Gallons per minute to cubic feet per second
+IN_TO_FT = 1 / 12.0  # Inches to feet
+G = 32.174  # Gravity in ft/s^2
+_rng = np.random.default_rng()  # Random generator for the transition-region friction factor
+
 moody_fig, moody_ax = plt.subplots()  # Create global Moody diagram figure
+moody_background = None  # Saved axes pixels used to blit new points (blit-capable canvases only)
 
 
 # endregion
@@ -22,43 +29,92 @@ def calculate_friction_factor(Re, rr):
       introducing some randomness using a normal distribution.
 
     Parameters:
-        Re (float): The Reynolds number.
-        rr (float): The relative roughness.
+        Re (float or ndarray): The Reynolds number, or an array of them for batch evaluation.
+        rr (float or ndarray): The relative roughness (broadcast against Re); if either argument
+            is an array the batch path is used.
 
     Returns:
-        float: The computed friction factor.
+        float or ndarray: The computed friction factor(s).
     """
+    if np.ndim(Re) or np.ndim(rr):
+        # Batch evaluation: every regime is computed with array operations in one pass
+        f_CB = pta.ff_colebrook_vec(Re, rr)  # Colebrook prediction
+        Re = np.broadcast_to(np.asarray(Re, dtype=float), f_CB.shape)
+        f_lam = 64 / Re  # Laminar prediction
+        f = np.where(Re >= 4000, f_CB, f_lam)
+        trans = (Re > 2000) & (Re < 4000)
+        mu_f = f_lam[trans] + (f_CB[trans] - f_lam[trans]) * ((Re[trans] - 2000) / 2000)
+        f[trans] = _rng.normal(mu_f, 0.2 * mu_f)
+        return f
+
     if Re >= 4000:
-        return pta.ff(Re, rr, CBEQN=True)  # Turbulent flow (Colebrook equation)
+        return pta.ff_colebrook(Re, rr)  # Turbulent flow (Colebrook equation)
     if Re <= 2000:
         return 64 / Re  # Laminar flow equation
 
     # Transition region: Compute friction factors for both regimes
-    f_CB = pta.ff(Re, rr, CBEQN=True)  # Colebrook prediction
+    f_CB = pta.ff_colebrook(Re, rr)  # Colebrook prediction
     f_lam = 64 / Re  # Laminar prediction
 
     # Interpolate friction factor
     mu_f = f_lam + (f_CB - f_lam) * ((Re - 2000) / 2000)
     sigma_f = 0.2 * mu_f
-    return rnd.normalvariate(mu_f, sigma_f)  # Generate random friction factor from normal distribution
+    return _rng.normal(mu_f, sigma_f)  # Generate random friction factor from normal distribution
 
 
-def compute_head_loss(f, Q, D):
+def compute_head_loss(f, V, D_ft):
     """
     Computes the head loss per foot (hf/L) using the Darcy-Weisbach equation.
 
     Parameters:
         f (float): Friction factor.
-        Q (float): Flow rate in gallons per minute.
-        D (float): Pipe diameter in inches.
+        V (float): Mean flow velocity in ft/s.
+        D_ft (float): Pipe diameter in feet.
 
     Returns:
         float: The head loss per foot in appropriate English units.
     """
-    g = 32.174  # Gravity in ft/s^2
-    D_ft = D / 12  # Convert diameter to feet
-    V = (Q / 448.831) / (np.pi * (D_ft / 2) ** 2)  # Velocity in ft/s
-    return (f * (V ** 2) / (2 * g * D_ft))  # Compute hf/L
+    return (f * (V ** 2) / (2 * G * D_ft))  # Compute hf/L
+
+
+def draw_moody_background():
+    """
+    Draws the Colebrook family on the global Moody diagram as a background for the user's points.
+
+    The grid comes from pta.moodyGrid, which loads (or builds and caches) it on disk, so this is
+    called from main rather than at import time.
+
+    Returns:
+        None
+    """
+    ReValsCB, rrVals, ffCB = pta.moodyGrid()
+    moody_ax.set_xscale('log')
+    moody_ax.set_yscale('log')
+    moody_ax.add_collection(LineCollection(np.stack((np.broadcast_to(ReValsCB, ffCB.shape), ffCB), axis=-1),
+                                           colors='0.7', linewidths=0.8))
+    moody_ax.set_xlabel("Reynolds Number (Re)")
+    moody_ax.set_ylabel("Friction Factor (f)")
+    moody_ax.set_title("Moody Diagram")
+
+
+def on_moody_draw(event):
+    """
+    Recaptures the saved Moody axes pixels after every full redraw (first draw, resize, etc.),
+    so blitting never restores a stale background.
+
+    Parameters:
+        event (DrawEvent): Matplotlib draw event.
+
+    Returns:
+        None
+    """
+    global moody_background
+    moody_ax.set_autoscale_on(False)  # Freeze limits so blitted points match the saved background
+    moody_background = moody_fig.canvas.copy_from_bbox(moody_ax.bbox)
+
+
+if moody_fig.canvas.supports_blit:
+    moody_fig.canvas.mpl_connect('draw_event', on_moody_draw)
 
 
 def plot_moody_diagram(Re, f):
@@ -72,13 +128,27 @@ def plot_moody_diagram(Re, f):
     Returns:
         None
     """
-    global moody_ax
+    global moody_background
     marker = '^' if 2000 < Re < 4000 else 'o'  # Triangle for transition, circle otherwise
-    moody_ax.scatter(Re, f, marker=marker, color='red')
-    moody_ax.set_xlabel("Reynolds Number (Re)")
-    moody_ax.set_ylabel("Friction Factor (f)")
-    moody_ax.set_title("Moody Diagram")
-    plt.draw()
+    canvas = moody_fig.canvas
+    x0, x1 = moody_ax.get_xlim()
+    y0, y1 = moody_ax.get_ylim()
+    if moody_background is not None and x0 <= Re <= x1 and y0 <= f <= y1:
+        # Point fits the current view: restore the saved pixels and draw only the new marker
+        canvas.restore_region(moody_background)
+        sc = moody_ax.scatter(Re, f, marker=marker, color='red')
+        moody_ax.draw_artist(sc)
+        canvas.blit(moody_ax.bbox)
+        moody_background = canvas.copy_from_bbox(moody_ax.bbox)  # Keep the new marker in the saved pixels
+    else:
+        # First point, one outside the current limits, or a canvas that cannot blit: full redraw
+        moody_ax.set_autoscale_on(True)
+        moody_ax.scatter(Re, f, marker=marker, color='red')
+        if canvas.supports_blit:
+            canvas.draw()  # on_moody_draw freezes the limits and recaptures moody_background
+        else:
+            canvas.draw_idle()
+    canvas.flush_events()
 
 
 def main():
@@ -95,23 +165,26 @@ def main():
     Returns:
         None
     """
+    draw_moody_background()
+    plt.show(block=False)  # Open the Moody diagram window without blocking input
     while True:
         D = float(input("Enter pipe diameter (in inches): ") or 12)
         e_mics = float(input("Enter pipe roughness (in micro-inches): ") or 150)
         Q = float(input("Enter flow rate (in gallons per minute): ") or 500)
 
         # Convert roughness from micro-inches to feet
-        e = e_mics * 1e-6 / 12
-        rr = e / (D / 12)  # Compute relative roughness
+        D_ft = D * IN_TO_FT
+        e = e_mics * 1e-6 * IN_TO_FT
+        rr = e / D_ft  # Compute relative roughness
 
         # Compute Reynolds number
         v_kinematic = 1.08e-5  # Kinematic viscosity of water in ft^2/s
-        V = (Q / 448.831) / (np.pi * (D / 12 / 2) ** 2)  # Velocity in ft/s
-        Re = (V * (D / 12)) / v_kinematic  # Reynolds number
+        V = Q * GPM_TO_CFS / (math.pi * (D_ft * 0.5) ** 2)  # Velocity in ft/s
+        Re = V * D_ft / v_kinematic  # Reynolds number
 
         # Compute friction factor and head loss
         f = calculate_friction_factor(Re, rr)
-        hf_L = compute_head_loss(f, Q, D)
+        hf_L = compute_head_loss(f, V, D_ft)
 
         # Display results
         print(f"Reynolds Number: {Re:.2f}")
@@ -120,7 +193,6 @@ def main():
 
         # Plot the new point on the Moody diagram
         plot_moody_diagram(Re, f)
-        plt.pause(0.1)  # Allow the plot to update
 
         # Ask the user if they want to input another set
         cont = input("Would you like to enter another set? (y/n): ").strip().lower()
@@ -2,6 +2,7 @@
 import numpy as np
 from scipy.integrate import solve_ivp
 import matplotlib.pyplot as plt
+from numba_compat import njit, prange
 
 
 # ===============================
@@ -12,20 +13,119 @@ def ode_system(t, X, *params):
     """
     Defines the system of ordinary differential equations (ODEs) for a piston system.
 
+    Fills and returns an ndarray directly instead of a list that solve_ivp has to convert.
+
+    Parameters:
+        t (float): Time variable.
+        X (ndarray): State variables [x, xdot, p1, p2].
+        params (tuple): System parameters (A, Cd, ps, pa, V, beta, rho, Kvalve, m, y).
+
+    Returns:
+        ndarray: Time derivatives [xdot, xddot, p1dot, p2dot].
+    """
+    A, Cd, ps, pa, V, beta, rho, Kvalve, m, y = params
+    x, xdot, p1, p2 = X[0], X[1], X[2], X[3]
+    dXdt = np.empty(4)
+    dXdt[0] = xdot
+    dXdt[1] = (A * (p1 - p2)) / m  # Acceleration of the piston
+    dXdt[2] = beta / V * (Kvalve * (ps - p1))  # Pressure change in chamber 1
+    dXdt[3] = beta / V * (Kvalve * (p2 - pa))  # Pressure change in chamber 2
+    return dXdt
+
+
+def jacobian(t, X, *params):
+    """
+    Analytic Jacobian of ode_system with respect to the state, for implicit/stiff solvers.
+
+    The system is linear in X, so the Jacobian is a constant matrix.
+
     Parameters:
         t (float): Time variable.
         X (list): State variables [x, xdot, p1, p2].
         params (tuple): System parameters (A, Cd, ps, pa, V, beta, rho, Kvalve, m, y).
 
     Returns:
-        list: Time derivatives [xdot, xddot, p1dot, p2dot].
+        ndarray: 4x4 matrix of partial derivatives d(Xdot_i)/d(X_j).
     """
     A, Cd, ps, pa, V, beta, rho, Kvalve, m, y = params
-    x, xdot, p1, p2 = X
-    xddot = (A * (p1 - p2)) / m  # Acceleration of the piston
-    p1dot = beta / V * (Kvalve * (ps - p1))  # Pressure change in chamber 1
-    p2dot = beta / V * (Kvalve * (p2 - pa))  # Pressure change in chamber 2
-    return [xdot, xddot, p1dot, p2dot]
+    k = beta / V * Kvalve  # Pressure relaxation rate
+    return np.array([[0.0, 1.0, 0.0, 0.0],
+                     [0.0, 0.0, A / m, -A / m],
+                     [0.0, 0.0, -k, 0.0],
+                     [0.0, 0.0, 0.0, k]])
+
+
+@njit(cache=True)
+def rk4_piston(t_eval, ic, A, Cd, ps, pa, V, beta, rho, Kvalve, m, y):
+    """
+    Integrates the piston system with a fixed-step classical Runge-Kutta (RK4) scheme.
+
+    The right-hand side of ode_system is inlined so the whole loop compiles with Numba.
+    The pressure equations are stiff (time constant V / (beta * Kvalve)) and RK4 is only
+    stable for steps below about 2.8 times that time constant, so each output interval is
+    split into enough equal substeps to keep the step under 2.5 time constants.
+
+    Parameters:
+        t_eval (ndarray): Output times, starting at the initial time.
+        ic (ndarray): Initial state [x, xdot, p1, p2].
+        A, Cd, ps, pa, V, beta, rho, Kvalve, m, y (float): System parameters as in ode_system.
+
+    Returns:
+        tuple: Contiguous 1-D arrays (x, xdot, p1, p2), each of length len(t_eval).
+    """
+    N = t_eval.size
+    x_arr, xdot_arr, p1_arr, p2_arr = np.empty(N), np.empty(N), np.empty(N), np.empty(N)
+    x, xdot, p1, p2 = ic[0], ic[1], ic[2], ic[3]
+    x_arr[0], xdot_arr[0], p1_arr[0], p2_arr[0] = x, xdot, p1, p2
+    k = beta / V * Kvalve  # Pressure relaxation rate
+    for i in range(N - 1):
+        dt = t_eval[i + 1] - t_eval[i]
+        substeps = max(1, int(np.ceil(dt * k / 2.5)))  # Stay inside the RK4 stability limit
+        h = dt / substeps
+        for _ in range(substeps):
+            # Stage 1
+            k1x, k1v, k1p1, k1p2 = xdot, A * (p1 - p2) / m, k * (ps - p1), k * (p2 - pa)
+            # Stage 2
+            xv, vv, p1v, p2v = x + 0.5 * h * k1x, xdot + 0.5 * h * k1v, p1 + 0.5 * h * k1p1, p2 + 0.5 * h * k1p2
+            k2x, k2v, k2p1, k2p2 = vv, A * (p1v - p2v) / m, k * (ps - p1v), k * (p2v - pa)
+            # Stage 3
+            xv, vv, p1v, p2v = x + 0.5 * h * k2x, xdot + 0.5 * h * k2v, p1 + 0.5 * h * k2p1, p2 + 0.5 * h * k2p2
+            k3x, k3v, k3p1, k3p2 = vv, A * (p1v - p2v) / m, k * (ps - p1v), k * (p2v - pa)
+            # Stage 4
+            xv, vv, p1v, p2v = x + h * k3x, xdot + h * k3v, p1 + h * k3p1, p2 + h * k3p2
+            k4x, k4v, k4p1, k4p2 = vv, A * (p1v - p2v) / m, k * (ps - p1v), k * (p2v - pa)
+
+            x += h / 6 * (k1x + 2 * k2x + 2 * k3x + k4x)
+            xdot += h / 6 * (k1v + 2 * k2v + 2 * k3v + k4v)
+            p1 += h / 6 * (k1p1 + 2 * k2p1 + 2 * k3p1 + k4p1)
+            p2 += h / 6 * (k1p2 + 2 * k2p2 + 2 * k3p2 + k4p2)
+        x_arr[i + 1], xdot_arr[i + 1], p1_arr[i + 1], p2_arr[i + 1] = x, xdot, p1, p2
+    return x_arr, xdot_arr, p1_arr, p2_arr
+
+
+@njit(parallel=True, cache=True)
+def rk4_piston_batch(t_eval, ic, params):
+    """
+    Runs rk4_piston for many parameter sets in parallel, e.g. for a sweep over Kvalve.
+
+    Each row picks its own substep count from its own pressure time constant.
+
+    Parameters:
+        t_eval (ndarray): Output times, starting at the initial time.
+        ic (ndarray): Initial state [x, xdot, p1, p2] shared by every run.
+        params (ndarray): Array of shape (N_params, 10), one row per parameter set
+            (A, Cd, ps, pa, V, beta, rho, Kvalve, m, y).
+
+    Returns:
+        tuple: Arrays (x, xdot, p1, p2), each of shape (N_params, len(t_eval)).
+    """
+    shape = (params.shape[0], t_eval.size)
+    x, xdot, p1, p2 = np.empty(shape), np.empty(shape), np.empty(shape), np.empty(shape)
+    for n in prange(params.shape[0]):
+        P = params[n]
+        x[n], xdot[n], p1[n], p2[n] = rk4_piston(t_eval, ic, P[0], P[1], P[2], P[3], P[4], P[5], P[6], P[7],
+                                                 P[8], P[9])
+    return x, xdot, p1, p2
 
 
 # ===============================
@@ -45,8 +145,10 @@ def main():
     pa = myargs[3]  # Ambient pressure
     ic = [0, 0, pa, pa]  # Initial conditions [position, velocity, pressure1, pressure2]
 
-    # Solve the ODE system using the Runge-Kutta method
-    sln = solve_ivp(ode_system, t_span, ic, args=myargs, t_eval=t_eval, method='RK45', rtol=1e-6, atol=1e-8)
+    # Solve the ODE system; the pressure equations are stiff, so use LSODA (switches to BDF)
+    # with the analytic Jacobian
+    sln = solve_ivp(ode_system, t_span, ic, args=myargs, t_eval=t_eval, method='LSODA', jac=jacobian,
+                    rtol=1e-6, atol=1e-8)
 
     # Extract solution values
     t, xvals, xdot, p1, p2 = sln.t, sln.y[0], sln.y[1], sln.y[2], sln.y[3]
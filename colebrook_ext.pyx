@@ -0,0 +1,50 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Ahead-of-time compiled Colebrook solver used by HW5SP25a.ff and HW5SP25a.ff_colebrook when available.
+
+Build in place with:
+    cythonize -i colebrook_ext.pyx
+"""
+from libc.math cimport fabs, log, sqrt
+
+cdef double INV_LN10 = 1.0 / log(10.0)  # log10(z) == log(z) * INV_LN10, matching HW5SP25a
+cdef double TWO_INV_LN10 = 2.0 * INV_LN10
+
+
+cpdef double ff_cb(double Re, double rr, double f0=0.0):
+    """
+    Solves the Colebrook equation for a single Reynolds number and relative roughness.
+
+    Parameters:
+    Re (float): Reynolds number.
+    rr (float): Relative pipe roughness.
+    f0 (float): Initial guess; values <= 0 select the Swamee-Jain estimate, which is also the
+        restart point if a step from f0 leaves f > 0.
+
+    Returns:
+    float: Friction factor.
+    """
+    cdef double k = rr / 3.7  # Constant roughness term, hoisted out of the iteration
+    cdef double f_sj = 0.25 / (log(k + 5.74 / Re ** 0.9) * INV_LN10) ** 2  # Swamee-Jain initial guess
+    cdef double f = f0 if f0 > 0 else f_sj
+    cdef double c = 2.51 / Re
+    cdef double u, z, g, g_u, g_uu, u_f, u_ff, g_f, g_ff, df
+    cdef int i
+    for i in range(10):
+        # Same Halley terms as HW5SP25a._colebrook_terms, inlined so this loop stays in C
+        u = 1 / sqrt(f)
+        z = k + c * u
+        g = u + TWO_INV_LN10 * log(z)
+        g_u = 1 + TWO_INV_LN10 * c / z
+        g_uu = -TWO_INV_LN10 * c * c / (z * z)
+        u_f = -0.5 * u * u * u
+        u_ff = 0.75 * u * u * u * u * u
+        g_f = g_u * u_f
+        g_ff = g_uu * u_f * u_f + g_u * u_ff
+        df = 2 * g * g_f / (2 * g_f * g_f - g * g_ff)  # Halley step
+        f = f - df
+        if not f > 0:  # Poor guess stepped out of range; restart from Swamee-Jain
+            f = f_sj
+        elif fabs(df) < 1e-12 * f:  # Converged; cubic convergence usually gets here in two steps
+            break
+    return f
@@ -0,0 +1,15 @@
+"""
+Optional Numba support shared by the homework modules.
+
+When numba is installed this re-exports njit and prange unchanged. Without it, njit returns the
+plain Python function and prange is range, so decorated code still runs (more slowly).
+"""
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; fall back to plain Python functions
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func